@@ -2,48 +2,60 @@
 
 from flask import Flask
 from flask_cors import CORS
+from flask_compress import Compress
 from flask_socketio import SocketIO
 from flask_migrate import Migrate
 from models import db
 from config import Config
+from json_provider import ORJSONProvider, ORJSONSocketIOSerializer
 from socket_manager import SocketManager
 from fileProcessor import FileProcessor
 from routes import setup_routes
 
 import logging
+import logging.handlers
+import queue
+import atexit
 import os
 
-# Configure logging
-# Create a logger
 logger = logging.getLogger('eddy_logger')
-logger.setLevel(logging.DEBUG)  # Set the minimum logging level
 
-# Create a file handler to write logs to a file
-log_file = os.path.join(os.path.dirname(__file__), 'eddy.log')
-file_handler = logging.FileHandler(log_file)
-file_handler.setLevel(logging.DEBUG)  # Set the minimum logging level for the file handler
-
-# Create a console handler to output logs to the console
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.DEBUG)  # Set the minimum logging level for the console handler
-
-# Create a formatter and set it for both handlers
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
-console_handler.setFormatter(formatter)
-
-# Add both handlers to the logger
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
-
-werkzeug_logger = logging.getLogger('werkzeug')
-werkzeug_logger.setLevel(logging.WARNING)
-
-def create_app():
+def setup_logging():
+    """Configures the eddy logger and starts its background writer, once per server process."""
+    logger.setLevel(logging.DEBUG if Config.DEBUG else logging.INFO)  # Debug records are only built when debugging
+
+    # Create a file handler to write logs to a file
+    log_file = os.path.join(os.path.dirname(__file__), 'eddy.log')
+    file_handler = logging.FileHandler(log_file)
+    file_handler.setLevel(logging.DEBUG)  # Set the minimum logging level for the file handler
+
+    # Create a console handler to output logs to the console
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.DEBUG)  # Set the minimum logging level for the console handler
+
+    # Create a formatter and set it for both handlers
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    file_handler.setFormatter(formatter)
+    console_handler.setFormatter(formatter)
+
+    # Route records through a queue so file and console I/O happen on a background thread
+    log_queue = queue.SimpleQueue()  # Unbounded and implemented in C, putting a record never blocks the logging thread
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    log_listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    log_listener.start()
+    atexit.register(log_listener.stop)
+
+    werkzeug_logger = logging.getLogger('werkzeug')
+    werkzeug_logger.setLevel(logging.WARNING)
+    logging.getLogger('socketio').setLevel(logging.WARNING)
+    logging.getLogger('engineio').setLevel(logging.WARNING)
+
+def create_app(config=Config):
   
     logger.info("Initializing FlaskApp...")
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config)
+    app.json = ORJSONProvider(app)
 
     # Initialize database
     db.init_app(app)
@@ -56,23 +68,27 @@ def create_app():
     # Initialize CORS
     CORS(app, resources={
         r"/*": {
-            "origins": Config.CORS_ORIGINS,
+            "origins": config.CORS_ORIGINS,
             "supports_credentials": True,
             "allow_headers": ["Content-Type", "Authorization"],
-            "methods": ["GET", "POST", "OPTIONS"]
+            "methods": ["GET", "PUT", "PATCH", "POST", "DELETE", "OPTIONS"],
+            "max_age": 3600  # Let browsers reuse a preflight for an hour instead of repeating it per request
         }
     })
 
+    # Compress JSON responses, the document listings carry the full document content
+    Compress(app)
+
     # Create database tables
     with app.app_context():
         db.create_all()
 
     # Init the temporary directory
-    if not os.path.exists(Config.TMP_PATH):
-        os.makedirs(Config.TMP_PATH)
+    if not os.path.exists(config.TMP_PATH):
+        os.makedirs(config.TMP_PATH)
     
     # Initialize the file processor
-    file_processor = FileProcessor(Config.TMP_PATH)
+    file_processor = FileProcessor(config.TMP_PATH)
 
 
     # setup routes
@@ -80,28 +96,42 @@ def create_app():
     
     return app
 
-app = create_app()
-socketio = SocketIO(
-    app=app,
-    cors_allowed_origins=Config.CORS_ORIGINS,
-    async_mode='threading',
-    logger=False,
-    engineio_logger=False,
-    ping_timeout=60000,
-    ping_interval=25000,
-    manage_session=True,
-    always_connect=True,
-    
-)
-
-gemini_api_key = os.getenv("GEMINI_API_KEY") # read from environment variables
-if not gemini_api_key:
-    logger.error("GEMINI_API_KEY environment variable not set")
-    # exit(1)
-
-socket_manager = SocketManager(socketio, gemini_api_key=gemini_api_key, debug=Config.DEBUG)
+def create_socket_manager(app):
+    socketio = SocketIO(
+        app=app,
+        cors_allowed_origins=Config.CORS_ORIGINS,
+        async_mode='threading',
+        json=ORJSONSocketIOSerializer,
+        logger=False,
+        engineio_logger=False,
+        ping_timeout=60000,
+        ping_interval=25000,
+        manage_session=True,
+        always_connect=True,
+        
+    )
+
+    gemini_api_key = os.getenv("GEMINI_API_KEY") # read from environment variables
+    if not gemini_api_key:
+        logger.error("GEMINI_API_KEY environment variable not set")
+        # exit(1)
+
+    return SocketManager(socketio, gemini_api_key=gemini_api_key, debug=Config.DEBUG)
+
+def create_server():
+    """
+    Sets up logging, the app and the socket server and returns the app, used by gunicorn.
+    Importing this module builds nothing, as the file processor workers may import it again.
+    """
+    setup_logging()
+    app = create_app()
+    create_socket_manager(app)
+    return app
 
-if __name__ == '__main__':
+def main():
+    setup_logging()
+    app = create_app()
+    socket_manager = create_socket_manager(app)
     socket_manager.socketio.run(
         app, 
         debug=Config.DEBUG,
@@ -111,4 +141,7 @@ if __name__ == '__main__':
         log_output=False, # hide heartbeat messages
         use_reloader=False,
         )
-    #app.run()
\ No newline at end of file
+    #app.run()
+
+if __name__ == '__main__':
+    main()
@@ -4,13 +4,52 @@ from typing import Union, Tuple, Optional, Callable
 from events import WebSocketEvent
 from flask import request, jsonify
 from flask_socketio import disconnect
+from cachetools import TTLCache
 import jwt
+import logging
 import os
+import threading
+import time
 from datetime import datetime, timedelta, timezone
 from models import User
 
+logger = logging.getLogger('eddy_logger')
+
 class Auth:
     SECRET_KEY = os.getenv('EDDY_SECRET_KEY')
+
+    # Non-sensitive user fields by user id, so repeated token checks skip the users table
+    _user_cache = TTLCache(maxsize=10000, ttl=30)
+    _user_cache_lock = threading.Lock()
+
+    # Verified token payloads by raw token, so repeated requests skip the signature check
+    _token_cache = TTLCache(maxsize=1024, ttl=300)
+    _token_cache_lock = threading.Lock()
+
+    @staticmethod
+    def get_cached_user(user_id) -> Optional[dict]:
+        """Returns the id, email and isAdmin of a user, or None if the user does not exist."""
+        # Token payloads carry string ids and routes pass integers, key the cache by the integer id
+        user_id = int(user_id)
+        with Auth._user_cache_lock:
+            user = Auth._user_cache.get(user_id)
+        if user is not None:
+            return user
+
+        existing_user = User.query.filter_by(id=user_id).first()
+        if not existing_user:
+            return None
+
+        user = {'id': existing_user.id, 'email': existing_user.email, 'isAdmin': existing_user.is_admin}
+        with Auth._user_cache_lock:
+            Auth._user_cache[user_id] = user
+        return user
+
+    @staticmethod
+    def invalidate_cached_user(user_id):
+        """Drops a user from the cache after their account was changed or deleted."""
+        with Auth._user_cache_lock:
+            Auth._user_cache.pop(int(user_id), None)
     
     @staticmethod
     def generate_token(user_id: str, is_admin: bool) -> str:
@@ -23,13 +62,22 @@ class Auth:
     
     @staticmethod
     def decode_token(token: str) -> Union[Tuple[dict, None], Tuple[None, str]]:
+        # Clients send the same token with every request, reuse its verified payload until it expires
+        with Auth._token_cache_lock:
+            payload = Auth._token_cache.get(token)
+        if payload is not None and payload['exp'] > time.time():
+            return payload, None
+
         try:
             payload = jwt.decode(token, Auth.SECRET_KEY, algorithms=['HS256'])
-            return payload, None
         except jwt.ExpiredSignatureError:
             return None, 'Token has expired'
         except jwt.InvalidTokenError:
             return None, 'Invalid token'
+
+        with Auth._token_cache_lock:
+            Auth._token_cache[token] = payload
+        return payload, None
     
     @staticmethod
     def socket_auth_required(emit_event: Callable):
@@ -40,7 +88,7 @@ class Auth:
                 auth_header = request.args.get('token')
 
                 if not auth_header:
-                    print("Authentication failed: Token missing")
+                    logger.warning("Authentication failed: Token missing")
                     emit_event(WebSocketEvent('server_authentication_failed', {
                         'message': 'Authentication token is missing'
                     }))
@@ -49,16 +97,17 @@ class Auth:
                 payload, error = Auth.decode_token(auth_header)
 
                 if error:
-                    print(f"Authentication failed: {error}")
+                    logger.warning("Authentication failed: %s", error)
                     emit_event(WebSocketEvent('server_authentication_failed', {
                         'message': error
                     }))
                     return False
                 
                 try:
-                    return f(payload['user_id'], *args, **kwargs)
+                    # Tokens carry the user id as a string, the user id columns are integers
+                    return f(int(payload['user_id']), *args, **kwargs)
                 except Exception as e:
-                    print(f"Error in authenticated handler: {str(e)}")
+                    logger.error("Error in authenticated handler: %s", e)
                     emit_event(WebSocketEvent('server_authentication_failed', {
                         'message': f'Authentication error: {str(e)}'
                     }))
@@ -76,7 +125,7 @@ class Auth:
                 auth_header = request.args.get('token')
 
                 if not auth_header:
-                    print("Authentication failed: Token missing")
+                    logger.warning("Authentication failed: Token missing")
                     emit_event(WebSocketEvent('server_authentication_failed', {
                         'message': 'Authentication token is missing'
                     }))
@@ -85,23 +134,24 @@ class Auth:
                 payload, error = Auth.decode_token(auth_header)
 
                 if error:
-                    print(f"Authentication failed: {error}")
+                    logger.warning("Authentication failed: %s", error)
                     emit_event(WebSocketEvent('server_authentication_failed', {
                         'message': error
                     }))
                     return False
                 
                 if not payload.get('is_admin', False):
-                    print("Authentication failed: User is not an admin")
+                    logger.warning("Authentication failed: User is not an admin")
                     emit_event(WebSocketEvent('server_authentication_failed', {
                         'message': 'User is not an admin'
                     }))
                     return False
                 
                 try:
-                    return f(payload['user_id'], *args, **kwargs)
+                    # Tokens carry the user id as a string, the user id columns are integers
+                    return f(int(payload['user_id']), *args, **kwargs)
                 except Exception as e:
-                    print(f"Error in authenticated handler: {str(e)}")
+                    logger.error("Error in authenticated handler: %s", e)
                     emit_event(WebSocketEvent('server_authentication_failed', {
                         'message': f'Authentication error: {str(e)}'
                     }))
@@ -127,7 +177,8 @@ class Auth:
             if not payload.get('user_id', False):
                 return jsonify({'message': 'Error retrieving user_id'}), 403
             
-            return f(payload.get('user_id', None), *args, **kwargs)
+            # Tokens carry the user id as a string, the user id columns are integers
+            return f(int(payload['user_id']), *args, **kwargs)
         return decorated_function
 
 
@@ -1,20 +1,13 @@
 # src/document_manager.py
-from models import db, Document, User
+from models import db, Document
 from typing import Optional, Union
 from utils import delta_to_html, delta_to_string
 
 class DocumentManager:
     @staticmethod
     def create_document(user_id: str, document_id: str) -> Document:
-        
-        document = Document.query.filter_by(id=document_id).first()
-        if document:
-            raise ValueError(f"Document with ID {document_id} already exists")
-        
-            
-        user = User.query.filter_by(id=user_id).first()
-                
-        document = Document(id=document_id, user=user, content={"ops": [{"insert": "\n"}]})
+        """Inserts a new empty document, raising an IntegrityError if the id is already taken."""
+        document = Document(id=document_id, user_id=user_id, content={"ops": [{"insert": "\n"}]})
         db.session.add(document)
         db.session.commit()
         return document
@@ -140,9 +140,9 @@ class EmbeddingManager:
     def _calculate_hash(text_content: str) -> str:
         """Generate sha-256 hash"""
         if isinstance(text_content, str):
-            return hashlib.sha256(text_content.encode()).hexdigest()
+            return hashlib.sha256(text_content.encode(), usedforsecurity=False).hexdigest()
         else:
-            return hashlib.sha256(text_content).hexdigest()
+            return hashlib.sha256(text_content, usedforsecurity=False).hexdigest()
 
     @staticmethod
     def _get_file_content_embeddings(file_content : FileContent) -> FileEmbedding:
@@ -395,6 +395,28 @@ class EmbeddingManager:
             return EmbeddingManager._get_document_embeddings(file) 
         else:
             raise ValueError(f"get_embeddings expects either a Document or a FileContent object")
+
+    @staticmethod
+    def get_document_embeddings_bulk(documents: List[Document]) -> List[int]:
+        """
+        Get the embedding ids for several documents. Documents with valid embeddings are
+        looked up with a single query, only the others go through get_embeddings.
+        """
+        valid_document_ids = [document.id for document in documents if document.embedding_valid]
+        embedding_ids_by_document = {}
+        if valid_document_ids:
+            embedding_ids_by_document = dict(
+                db.session.query(FileEmbedding.document_id, FileEmbedding.id)
+                .filter(FileEmbedding.document_id.in_(valid_document_ids))
+                .all()
+            )
+        logging.info(f"Found {len(embedding_ids_by_document)} valid embeddings for {len(documents)} documents")
+
+        return [
+            embedding_ids_by_document[document.id] if document.id in embedding_ids_by_document
+            else EmbeddingManager.get_embeddings(document)
+            for document in documents
+        ]
         
 
     @staticmethod
@@ -1,11 +1,66 @@
 import os
 import hashlib
+import logging
+import multiprocessing
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 
+logger = logging.getLogger('eddy_logger')
+
+def _worker_context():
+    """
+    Start method of the extraction workers. Forking the multithreaded server process could copy locks
+    held by its request and logging threads, so workers are forked from a fork server that only
+    preloads this module, or spawned where no fork server is available.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context('spawn')
+
 class FileProcessor:
     
-    def __init__(self, tmp_path):
+    def __init__(self, tmp_path, max_workers=None):
         self.tmp_path = tmp_path
+        self.max_workers = max_workers or os.cpu_count()
+        self._executor_lock = threading.Lock()
+        self._executor = self._create_executor()
+
+    def __getstate__(self):
+        # The pool stays in the parent process, workers only need the processor settings
+        state = self.__dict__.copy()
+        del state['_executor']
+        del state['_executor_lock']
+        return state
+
+    def _create_executor(self):
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=_worker_context())
+
+    def _replace_broken_executor(self, broken_executor):
+        """Swaps in a new pool for a broken one, once, even if several request threads notice it together."""
+        with self._executor_lock:
+            if self._executor is broken_executor:
+                logger.warning("File processor worker died, starting a new worker pool")
+                broken_executor.shutdown(wait=False)
+                self._executor = self._create_executor()
+        
+    def submit_file_content(self, filename, content):
+        """
+        Schedule process_file_content on the worker processes and return its future,
+        so several files are extracted in parallel on all cores without holding the GIL
+        of the request threads.
+        """
+        executor = self._executor
+        try:
+            return executor.submit(self.process_file_content, filename, content)
+        except BrokenProcessPool:
+            # A worker that died (killed for memory, crashed in a parser) breaks its pool for good
+            self._replace_broken_executor(executor)
+            return self._executor.submit(self.process_file_content, filename, content)
         
     def is_mostly_text(self, text, threshold=0.8):
         """
@@ -36,14 +91,15 @@ class FileProcessor:
         """
         Process file content based on file type and return extracted text and hash.
         """
+        temp_file_path = None
         try:
             import textract
-            # Create temporary file
-            temp_file_path = os.path.join(self.tmp_path, filename)
-            with open(temp_file_path, 'wb') as temp_file:
-                temp_file.write(content)
-
             file_extension = Path(filename).suffix.lower()
+
+            # Create a uniquely named temporary file, as files with the same name may be processed concurrently
+            with tempfile.NamedTemporaryFile(dir=self.tmp_path, suffix=file_extension, delete=False) as temp_file:
+                temp_file_path = temp_file.name
+                temp_file.write(content)
             
             try:
                 # Handle different file types
@@ -74,7 +130,8 @@ class FileProcessor:
                 
                 # Calculate hash
                 text_content_hash = hashlib.sha256(
-                    extracted_text.encode()
+                    extracted_text.encode(),
+                    usedforsecurity=False
                 ).hexdigest()
                 
                 return {
@@ -97,5 +154,5 @@ class FileProcessor:
             
         finally:
             # Clean up temporary file
-            if os.path.exists(temp_file_path):
+            if temp_file_path and os.path.exists(temp_file_path):
                 os.remove(temp_file_path)
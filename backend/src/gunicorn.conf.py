@@ -0,0 +1,14 @@
+# src/gunicorn.conf.py
+# Production server settings, start with: gunicorn -c gunicorn.conf.py 'app:create_server()'
+
+bind = '0.0.0.0:5000'
+
+# Socket.IO rooms and the active users are kept in process memory, so every client has to reach
+# the same process. Scale with threads, as the threading async mode serves one connection per thread.
+workers = 1
+worker_class = 'gthread'
+threads = 100
+
+# Long polling and websocket connections stay open far longer than a regular request
+timeout = 120
+graceful_timeout = 30
@@ -0,0 +1,34 @@
+# src/json_provider.py
+from flask.json.provider import JSONProvider
+import orjson
+
+# Naive datetimes are stored in UTC; numpy arrays come from the embedding columns
+ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+
+class ORJSONProvider(JSONProvider):
+    """
+    Flask JSON provider backed by orjson, so jsonify and request.get_json use its much faster
+    encoder and decoder. Datetimes are serialized as ISO 8601 strings.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=ORJSON_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+class ORJSONSocketIOSerializer:
+    """
+    Drop-in for the json module that Socket.IO encodes and decodes every packet with. The default
+    flask.json only uses the app provider inside an app context and falls back to the standard
+    library for emits from background threads.
+    """
+
+    @staticmethod
+    def dumps(obj, **kwargs):
+        return orjson.dumps(obj, option=ORJSON_OPTIONS).decode()
+
+    @staticmethod
+    def loads(s, **kwargs):
+        return orjson.loads(s)
@@ -0,0 +1,37 @@
+"""Add content_size_bytes to documents, maintained by a trigger
+
+Revision ID: 0a5d7f3e9c41
+Revises: e83f0c6a1b27
+Create Date: 2026-10-17 13:18:06.471925
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from models import DOCUMENT_CONTENT_SIZE_FUNCTION_SQL, DOCUMENT_CONTENT_SIZE_TRIGGER_SQL
+
+
+# revision identifiers, used by Alembic.
+revision = '0a5d7f3e9c41'
+down_revision = 'e83f0c6a1b27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('documents', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_size_bytes', sa.Integer(), nullable=True))
+
+    op.execute(DOCUMENT_CONTENT_SIZE_FUNCTION_SQL)
+    op.execute(DOCUMENT_CONTENT_SIZE_TRIGGER_SQL)
+
+    # Backfill existing documents
+    op.execute("UPDATE documents SET content_size_bytes = octet_length(content::text)")
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS documents_content_size ON documents")
+    op.execute("DROP FUNCTION IF EXISTS set_document_content_size()")
+
+    with op.batch_alter_table('documents', schema=None) as batch_op:
+        batch_op.drop_column('content_size_bytes')
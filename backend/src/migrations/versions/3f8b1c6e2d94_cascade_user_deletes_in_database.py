@@ -0,0 +1,39 @@
+"""Cascade user deletes to access grants and dialog histories
+
+Revision ID: 3f8b1c6e2d94
+Revises: 0a5d7f3e9c41
+Create Date: 2026-10-17 16:12:08.431275
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f8b1c6e2d94'
+down_revision = '0a5d7f3e9c41'
+branch_labels = None
+depends_on = None
+
+# (table, column, referenced table) of the foreign keys that cascade deletes
+CASCADING_FOREIGN_KEYS = (
+    ('document_read_access', 'user_id', 'users'),
+    ('document_edit_access', 'user_id', 'users'),
+    ('dialog_histories', 'user_id', 'users'),
+)
+
+
+def _recreate_foreign_keys(ondelete):
+    for table, column, referenced_table in CASCADING_FOREIGN_KEYS:
+        constraint_name = f'{table}_{column}_fkey'
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_constraint(constraint_name, type_='foreignkey')
+            batch_op.create_foreign_key(constraint_name, referenced_table, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    _recreate_foreign_keys('CASCADE')
+
+
+def downgrade():
+    _recreate_foreign_keys(None)
@@ -0,0 +1,45 @@
+"""Rehash file_contents content and prefix hashes with BLAKE3
+
+Revision ID: 4dcbed815fb2
+Revises: dfe9b65d146c
+Create Date: 2026-10-17 09:48:05.118342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import blake3
+import hashlib
+
+
+# revision identifiers, used by Alembic.
+revision = '4dcbed815fb2'
+down_revision = 'dfe9b65d146c'
+branch_labels = None
+depends_on = None
+
+PREFIX_HASH_BYTES = 64 << 10
+
+
+def _rehash(hash_function):
+    bind = op.get_bind()
+    file_content_ids = bind.execute(sa.text("SELECT id FROM file_contents")).scalars().all()
+    for file_content_id in file_content_ids:
+        content = bind.execute(
+            sa.text("SELECT content FROM file_contents WHERE id = :id"), {'id': file_content_id}
+        ).scalar_one()
+        bind.execute(
+            sa.text("UPDATE file_contents SET content_hash = :content_hash, prefix_hash = :prefix_hash WHERE id = :id"),
+            {
+                'id': file_content_id,
+                'content_hash': hash_function(content).hexdigest(),
+                'prefix_hash': hash_function(content[:PREFIX_HASH_BYTES]).hexdigest(),
+            }
+        )
+
+
+def upgrade():
+    _rehash(blake3.blake3)
+
+
+def downgrade():
+    _rehash(hashlib.sha256)
@@ -0,0 +1,46 @@
+"""Add access check and thumbnail lookup indexes
+
+Revision ID: 7c2e91a4d5b3
+Revises: 4dcbed815fb2
+Create Date: 2026-10-17 11:02:17.640513
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e91a4d5b3'
+down_revision = '4dcbed815fb2'
+branch_labels = None
+depends_on = None
+
+ACCESS_TABLES = ('document_read_access', 'document_edit_access')
+
+
+def upgrade():
+    for table in ACCESS_TABLES:
+        # Keep the oldest grant of duplicated (document, user) pairs so the unique index can be built
+        op.execute(
+            f"DELETE FROM {table} a USING {table} b "
+            "WHERE a.document_id = b.document_id AND a.user_id = b.user_id AND a.id > b.id"
+        )
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.create_index(f'ix_{table}_document_user', ['document_id', 'user_id'], unique=True)
+            batch_op.create_index(f'ix_{table}_user_id', ['user_id'], unique=False)
+
+    with op.batch_alter_table('thumbnails', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_thumbnails_document_id'), ['document_id'], unique=False)
+
+    for table in ACCESS_TABLES + ('thumbnails',):
+        op.execute(f"ANALYZE {table}")
+
+
+def downgrade():
+    with op.batch_alter_table('thumbnails', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_thumbnails_document_id'))
+
+    for table in ACCESS_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{table}_user_id')
+            batch_op.drop_index(f'ix_{table}_document_user')
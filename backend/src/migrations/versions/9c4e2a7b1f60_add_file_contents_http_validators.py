@@ -0,0 +1,28 @@
+"""Add the HTTP validators of fetched websites to file_contents
+
+Revision ID: 9c4e2a7b1f60
+Revises: 3f8b1c6e2d94
+Create Date: 2026-10-17 18:04:37.118502
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4e2a7b1f60'
+down_revision = '3f8b1c6e2d94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('file_contents', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('http_etag', sa.String(length=1024), nullable=True))
+        batch_op.add_column(sa.Column('http_last_modified', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('file_contents', schema=None) as batch_op:
+        batch_op.drop_column('http_last_modified')
+        batch_op.drop_column('http_etag')
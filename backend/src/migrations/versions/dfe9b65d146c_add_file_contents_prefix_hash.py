@@ -0,0 +1,35 @@
+"""Add prefix_hash to file_contents
+
+Revision ID: dfe9b65d146c
+Revises: b51bf915f99f
+Create Date: 2026-10-17 09:12:41.503217
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'dfe9b65d146c'
+down_revision = 'b51bf915f99f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('file_contents', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('prefix_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index('ix_file_contents_size_prefix_hash', ['size', 'prefix_hash'], unique=False)
+
+    # Backfill existing rows so they take part in the size + prefix duplicate pre-check
+    op.execute(
+        "UPDATE file_contents "
+        "SET size = octet_length(content), "
+        "prefix_hash = encode(sha256(substring(content from 1 for 65536)), 'hex')"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('file_contents', schema=None) as batch_op:
+        batch_op.drop_index('ix_file_contents_size_prefix_hash')
+        batch_op.drop_column('prefix_hash')
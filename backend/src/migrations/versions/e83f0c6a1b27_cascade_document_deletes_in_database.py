@@ -0,0 +1,42 @@
+"""Cascade document deletes in the database
+
+Revision ID: e83f0c6a1b27
+Revises: 7c2e91a4d5b3
+Create Date: 2026-10-17 11:41:53.207846
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e83f0c6a1b27'
+down_revision = '7c2e91a4d5b3'
+branch_labels = None
+depends_on = None
+
+# (table, column, referenced table) of the foreign keys that cascade deletes
+CASCADING_FOREIGN_KEYS = (
+    ('document_read_access', 'document_id', 'documents'),
+    ('document_edit_access', 'document_id', 'documents'),
+    ('thumbnails', 'document_id', 'documents'),
+    ('file_embeddings', 'document_id', 'documents'),
+    ('dialog_histories', 'document_id', 'documents'),
+    ('sequence_embeddings', 'file_id', 'file_embeddings'),
+)
+
+
+def _recreate_foreign_keys(ondelete):
+    for table, column, referenced_table in CASCADING_FOREIGN_KEYS:
+        constraint_name = f'{table}_{column}_fkey'
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_constraint(constraint_name, type_='foreignkey')
+            batch_op.create_foreign_key(constraint_name, referenced_table, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    _recreate_foreign_keys('CASCADE')
+
+
+def downgrade():
+    _recreate_foreign_keys(None)
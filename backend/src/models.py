@@ -2,6 +2,7 @@
 from pyexpat.errors import messages
 from typing import List, Optional
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import DDL, event
 from pgvector.sqlalchemy import Vector
 from datetime import datetime, timezone
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -18,26 +19,36 @@ class DocumentReadAccess(db.Model):
     __tablename__ = 'document_read_access'
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    document_id = db.Column(db.String(36), db.ForeignKey('documents.id'), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    document_id = db.Column(db.String(36), db.ForeignKey('documents.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     granted_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
 
     # Relationships
     document = db.relationship('Document', back_populates='read_access_entries')
     user = db.relationship('User', back_populates='read_access_documents')
 
+    __table_args__ = (
+        db.Index('ix_document_read_access_document_user', 'document_id', 'user_id', unique=True),
+        db.Index('ix_document_read_access_user_id', 'user_id'),
+    )
+
 class DocumentEditAccess(db.Model):
     __tablename__ = 'document_edit_access'
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    document_id = db.Column(db.String(36), db.ForeignKey('documents.id'), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    document_id = db.Column(db.String(36), db.ForeignKey('documents.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     granted_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
 
     # Relationships
     document = db.relationship('Document', back_populates='edit_access_entries')
     user = db.relationship('User', back_populates='edit_access_documents')
 
+    __table_args__ = (
+        db.Index('ix_document_edit_access_document_user', 'document_id', 'user_id', unique=True),
+        db.Index('ix_document_edit_access_user_id', 'user_id'),
+    )
+
 class Document(db.Model):
     __tablename__ = 'documents'
     
@@ -49,16 +60,20 @@ class Document(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
     embedding_valid = db.Column(db.Boolean, default=False)
+    # Byte length of the content as JSON text (not its compressed on-disk size), kept up to date by the documents_content_size trigger
+    content_size_bytes = db.Column(db.Integer, server_default=db.FetchedValue(), server_onupdate=db.FetchedValue())
     
     # Relationships
     user = db.relationship('User', backref=db.backref('documents', lazy=True))
-    read_access_entries = db.relationship('DocumentReadAccess', back_populates='document', lazy='dynamic')
-    edit_access_entries = db.relationship('DocumentEditAccess', back_populates='document', lazy='dynamic')
-    file_embedding = db.relationship('FileEmbedding', backref=db.backref('document', lazy=True))
+    # Dependent rows are removed by the ON DELETE CASCADE foreign keys, not loaded and deleted one by one
+    read_access_entries = db.relationship('DocumentReadAccess', back_populates='document', lazy='dynamic', passive_deletes=True)
+    edit_access_entries = db.relationship('DocumentEditAccess', back_populates='document', lazy='dynamic', passive_deletes=True)
+    file_embedding = db.relationship('FileEmbedding', backref=db.backref('document', lazy=True), passive_deletes=True)
     thumbnail = db.relationship("Thumbnail", 
                               uselist=False,  # one-to-one
                               back_populates="document", 
-                              cascade="all, delete-orphan")  # delete thumbn
+                              cascade="all, delete-orphan",  # delete thumbn
+                              passive_deletes=True)
 
     def apply_delta(self, delta):
         """Apply a Quill delta to the document content"""
@@ -94,6 +109,26 @@ class Document(db.Model):
         
         return Delta(self.content['ops'] if isinstance(self.content, dict) else self.content)
     
+# Trigger keeping content_size_bytes at the byte length of the content's JSON text. The migration adding
+# the column runs the same statements, so both setups stay identical
+DOCUMENT_CONTENT_SIZE_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION set_document_content_size() RETURNS trigger AS $$
+BEGIN
+    NEW.content_size_bytes := octet_length(NEW.content::text);
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+DOCUMENT_CONTENT_SIZE_TRIGGER_SQL = """
+CREATE TRIGGER documents_content_size
+BEFORE INSERT OR UPDATE OF content ON documents
+FOR EACH ROW EXECUTE FUNCTION set_document_content_size()
+"""
+
+# Install the content size trigger together with the table, so databases created with create_all have it too
+event.listen(Document.__table__, 'after_create', DDL(DOCUMENT_CONTENT_SIZE_FUNCTION_SQL))
+event.listen(Document.__table__, 'after_create', DDL(DOCUMENT_CONTENT_SIZE_TRIGGER_SQL))
+
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -105,8 +140,9 @@ class User(db.Model):
     is_admin = db.Column(db.Boolean, default=False)
 
     # Relationships
-    read_access_documents = db.relationship('DocumentReadAccess', back_populates='user', lazy='dynamic')
-    edit_access_documents = db.relationship('DocumentEditAccess', back_populates='user', lazy='dynamic')
+    # Access grants are removed by the ON DELETE CASCADE foreign keys when the user is deleted
+    read_access_documents = db.relationship('DocumentReadAccess', back_populates='user', lazy='dynamic', passive_deletes=True)
+    edit_access_documents = db.relationship('DocumentEditAccess', back_populates='user', lazy='dynamic', passive_deletes=True)
     
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -124,25 +160,33 @@ class FileContent(db.Model):
     text_content_hash = db.Column(db.String(256), unique=True)
     content = db.Column(db.LargeBinary, nullable=False)
     content_hash = db.Column(db.String(256), unique=True)
+    prefix_hash = db.Column(db.String(64), nullable=True)
     size = db.Column(db.Integer, nullable=False)
     file_type = db.Column(db.String(256), nullable=True)
     last_modified = db.Column(db.DateTime, default=datetime.now(timezone.utc), nullable=True)
     creation_date = db.Column(db.DateTime, default=datetime.now(timezone.utc))
+    # ETag and Last-Modified headers a fetched website was served with, sent back to revalidate it
+    http_etag = db.Column(db.String(1024), nullable=True)
+    http_last_modified = db.Column(db.String(64), nullable=True)
 
     # Relationships
     file_embeddings = db.relationship('FileEmbedding', back_populates='content', lazy='dynamic')
+
+    __table_args__ = (
+        db.Index('ix_file_contents_size_prefix_hash', 'size', 'prefix_hash'),
+    )
     
 class FileEmbedding(db.Model):
     __tablename__ = "file_embeddings"
 
     id = db.Column(db.Integer, primary_key=True, index=True, unique=True)
-    document_id = db.Column(db.String(36), db.ForeignKey("documents.id"), nullable=True)  # Relation to Document
+    document_id = db.Column(db.String(36), db.ForeignKey("documents.id", ondelete='CASCADE'), nullable=True)  # Relation to Document
     content_id = db.Column(db.Integer, db.ForeignKey("file_contents.id"), nullable=True)
     creation_date = db.Column(db.DateTime, default=datetime.now(timezone.utc))
 
 
     # Relationship to SequenceEmbedding
-    sequences = db.relationship("SequenceEmbedding", back_populates="file", cascade="all, delete-orphan")
+    sequences = db.relationship("SequenceEmbedding", back_populates="file", cascade="all, delete-orphan", passive_deletes=True)
     content = db.relationship("FileContent", back_populates="file_embeddings", lazy='joined')
 
 
@@ -150,7 +194,7 @@ class SequenceEmbedding(db.Model):
     __tablename__ = "sequence_embeddings"
 
     id = db.Column(db.Integer, primary_key=True, index=True, unique=True)
-    file_id = db.Column(db.Integer, db.ForeignKey("file_embeddings.id"))  # Relation to FileEmbedding
+    file_id = db.Column(db.Integer, db.ForeignKey("file_embeddings.id", ondelete='CASCADE'))  # Relation to FileEmbedding
     sequence_hash = db.Column(db.String(256), unique=True)
     sequence_text = db.Column(db.Text)
     embedding = db.Column(Vector(768))  # Store individual embeddings
@@ -162,7 +206,7 @@ class Thumbnail(db.Model):
     __tablename__ = 'thumbnails'
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    document_id = db.Column(db.String(36), db.ForeignKey('documents.id'), nullable=False) 
+    document_id = db.Column(db.String(36), db.ForeignKey('documents.id', ondelete='CASCADE'), nullable=False, index=True)
     image_data = db.Column(db.LargeBinary, nullable=False)  # Store the image data
     creation_date = db.Column(db.DateTime, default=datetime.now(timezone.utc))
 
@@ -197,8 +241,8 @@ class DialogHistory(db.Model):
     __tablename__ = 'dialog_histories'
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    document_id = db.Column(db.String(36), db.ForeignKey('documents.id'), nullable=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    document_id = db.Column(db.String(36), db.ForeignKey('documents.id', ondelete='CASCADE'), nullable=True)
     turns = db.Column(db.JSON, nullable=False)
 
     def __init__(self, user_id: int, document_id: str, turns: Optional[List[DialogTurn]] = None):
@@ -1,25 +1,206 @@
 from models import db, User, Document, DocumentReadAccess, DocumentEditAccess, Thumbnail, FileContent, FileEmbedding, SequenceEmbedding
-from sqlalchemy import text
+from sqlalchemy import func, cast, case, delete, literal, or_, select, tuple_, union_all, Integer
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from auth import Auth
 from werkzeug.utils import secure_filename
 from bs4 import BeautifulSoup
 from sqlalchemy.exc import IntegrityError
 from embedding_manager import EmbeddingManager
 from document_manager import DocumentManager
-from flask import jsonify, request, send_file
+from flask import abort, current_app, jsonify, request, send_file, stream_with_context
 from datetime import datetime
 from delta import Delta
 from config import Config
+from json_provider import ORJSON_OPTIONS
 
 import logging
 import hashlib
+import blake3
+import orjson
 import subprocess
 import uuid
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import io
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 logger = logging.getLogger('eddy_logger')
 
+# Line breaks and double spaces (with surrounding whitespace) separate text chunks of a parsed website,
+# the line breaks being every boundary str.splitlines splits on
+_TEXT_BREAK_RE = re.compile(r'\s*(?:[\n\r\v\f\x1c-\x1e\x85\u2028\u2029]|  )\s*')
+
+# Shared HTTP session so website fetches reuse pooled connections
+_http_session = requests.Session()
+_http_adapter = HTTPAdapter(pool_connections=100, pool_maxsize=100, max_retries=Retry(total=2, backoff_factor=0.2))
+_http_session.mount('http://', _http_adapter)
+_http_session.mount('https://', _http_adapter)
+
+# Columns returned for document listings, read as plain rows instead of hydrated ORM objects
+_DOCUMENT_LIST_COLUMNS = (
+    Document.id,
+    Document.title,
+    Document.title_manually_set,
+    Document.user_id,
+    Document.created_at,
+    Document.updated_at,
+    Document.content,
+    Thumbnail.id.label('thumbnail_id'),
+)
+
+# Thumbnails are immutable once created, so they can be cached for a year
+_THUMBNAIL_MAX_AGE = 365 * 24 * 60 * 60
+
+# Constant bodies of the health and test endpoints, encoded once instead of on every probe
+_HEALTH_BODY = orjson.dumps({"status": "healthy"})
+_TEST_BODY = orjson.dumps({"message": "API is working"})
+
+# Leading bytes of a file hashed together with its size as a cheap duplicate pre-check
+_PREFIX_HASH_BYTES = 64 << 10
+
+def _content_hasher():
+    """Returns a BLAKE3 hasher for file content dedup keys, multithreaded for large inputs."""
+    return blake3.blake3(max_threads=blake3.blake3.AUTO)
+
+def _content_hash(content):
+    """Hashes the given content with the dedup hasher."""
+    hasher = _content_hasher()
+    hasher.update(content)
+    return hasher.hexdigest()
+
+def _prefix_hash(content):
+    """Hashes the first _PREFIX_HASH_BYTES of the given content."""
+    return blake3.blake3(content[:_PREFIX_HASH_BYTES]).hexdigest()
+
+# Pandoc reader for each structure upload extension, since the format cannot be guessed from stdin
+_PANDOC_INPUT_FORMATS = {
+    '.md': 'markdown',
+    '.markdown': 'markdown',
+    '.txt': 'markdown',
+    '.html': 'html',
+    '.htm': 'html',
+    '.docx': 'docx',
+    '.odt': 'odt',
+    '.rtf': 'rtf',
+    '.epub': 'epub',
+    '.rst': 'rst',
+    '.tex': 'latex',
+    '.org': 'org',
+    '.ipynb': 'ipynb',
+}
+
+# Rows fetched from the database per round trip when streaming a listing
+_STREAM_BATCH_SIZE = 1000
+
+def _ojsonify(data, status=200):
+    """Like jsonify, but serializes with orjson, which encodes datetimes natively and much faster."""
+    return current_app.response_class(
+        orjson.dumps(data, option=ORJSON_OPTIONS),
+        status=status,
+        mimetype='application/json'
+    )
+
+def _ojsonify_stream(rows, row_to_dict=dict):
+    """
+    Streams result rows as a JSON array, one batch at a time, without building the whole list in memory.
+    Each row is converted with row_to_dict, which defaults to dict for mapping results.
+    """
+    def generate():
+        yield b'['
+        separator = b''
+        for partition in rows.partitions():
+            # Encode the whole batch in one orjson call and strip its brackets to splice it into the array
+            yield separator + orjson.dumps([row_to_dict(row) for row in partition], option=ORJSON_OPTIONS)[1:-1]
+            separator = b','
+        yield b']'
+
+    return current_app.response_class(stream_with_context(generate()), mimetype='application/json')
+
+def _listing_etag(model):
+    """
+    ETag for the admin listing of a table whose rows are only inserted and deleted, never updated,
+    built from its row count and highest id.
+    """
+    row_count, max_id = db.session.execute(select(func.count(), func.max(model.id))).one()
+    return f'{model.__tablename__}-{row_count}-{max_id}'
+
+def _not_modified(etag):
+    """Empty 304 response telling the client its cached copy with the given ETag is still current."""
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    return response
+
+def _hash_upload(file, may_be_duplicate):
+    """
+    Computes the content hash of an uploaded file. Possible duplicates are hashed straight from the
+    stream and their content is not kept; other files are read once and returned with their hash.
+    """
+    if may_be_duplicate:
+        hasher = _content_hasher()
+        for chunk in iter(lambda: file.stream.read(1 << 20), b''):
+            hasher.update(chunk)
+        file.stream.seek(0)
+        return None, hasher.hexdigest()
+
+    content = file.stream.read()
+    return content, _content_hash(content)
+
+def _commit_single_file_content(file_content):
+    """Inserts and commits the values of one new FileContent on its own, returning its id or None if the insert failed."""
+    try:
+        file_id = db.session.execute(
+            insert(FileContent).values(file_content).returning(FileContent.id)
+        ).scalar_one()
+        db.session.commit()
+        return file_id
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error storing file {file_content['filepath']}: {e}")
+        return None
+
+def _admin_document_row_to_dict(row):
+    """Converts an admin document listing row to the entry the admin dashboard expects."""
+    document_info = {
+        'id': row.id,
+        'title': row.title,
+        'title_manually_set': row.title_manually_set,
+        'user_id': row.user_id,
+        'created_at': row.created_at,
+        'last_modified': row.updated_at,
+        'size_kb': round((row.size_in_bytes or 0) / 1024.0, 2),
+        'collaborators': row.collaborators,
+    }
+
+    # Include thumbnail_id only if it exists
+    if row.thumbnail_id is not None:
+        document_info['thumbnail_id'] = row.thumbnail_id
+    return document_info
+
+def _existing_website_result(url, file_content):
+    """Builds the extract_text_website response for a website that is already stored."""
+    return {
+        'filename': url,
+        'file_id': file_content.id,
+        'raw': { 
+            'type' : file_content.file_type,
+            'size' : file_content.size, 
+            'lastModified' : file_content.last_modified
+            },
+        'success': True,
+        'text_extracted': file_content.text_content,
+        'message': 'Website already exists',
+        'content_type': 'file_content',
+    }
+
+def _document_row_to_dict(row):
+    """Converts a document listing row to a dict, leaving out thumbnail_id if the document has none."""
+    document_info = dict(row)
+    if document_info['thumbnail_id'] is None:
+        del document_info['thumbnail_id']
+    return document_info
+
 def setup_routes(app, file_processor):
     @app.route('/api/login', methods=['POST'])
     def login():
@@ -79,14 +260,14 @@ def setup_routes(app, file_processor):
     @Auth.rest_auth_required
     def authenticate_token(user_id):
         logger.info(f"Token authentication requested for user ID: {user_id}")
-        existing_user = User.query.filter_by(id=user_id).first()
+        existing_user = Auth.get_cached_user(user_id)
         if not existing_user:
             logger.warning(f"Token authentication failed: User not found for ID: {user_id}")
             return jsonify({'message': 'User not found'}), 404
         
-        logger.info(f"Token authentication successful for user: {existing_user.email}")
+        logger.info(f"Token authentication successful for user: {existing_user['email']}")
         return jsonify({    
-            'user': {'id': existing_user.id, 'email': existing_user.email, 'isAdmin': existing_user.is_admin}
+            'user': existing_user
         })
 
     @app.route('/api/documents/<string:document_id>/collaborators', methods=['POST'])
@@ -158,7 +339,7 @@ def setup_routes(app, file_processor):
             return jsonify({'message': f'Collaborator {collaborator_email} added with {rights} access to document {document_id}'}), 200
         except Exception as e:
             db.session.rollback()
-            print(f"Error adding collaborator: {e}")
+            logger.error(f"Error adding collaborator: {e}")
             return jsonify({'message': 'Failed to add collaborator'}), 500
 
     @app.route('/api/thumbnails', methods=['POST'])
@@ -174,7 +355,7 @@ def setup_routes(app, file_processor):
             logger.warning("Thumbnail creation failed: Missing image data.")
             return jsonify({'message': 'Missing image data'}), 400
         
-        document = Document.query.get_or_404(document_id)
+        document = db.get_or_404(Document, document_id)
 
         try:
 
@@ -202,7 +383,7 @@ def setup_routes(app, file_processor):
     @Auth.rest_auth_required
     def get_thumbnail(user_id, thumbnail_id):
         logger.info(f"Retrieving thumbnail: {thumbnail_id} for user: {user_id}")
-        thumbnail = Thumbnail.query.get_or_404(thumbnail_id)
+        thumbnail = db.get_or_404(Thumbnail, thumbnail_id)
 
         # Check if the user has access to the document associated with the thumbnail
         if thumbnail.document:
@@ -216,19 +397,26 @@ def setup_routes(app, file_processor):
                         return jsonify({'message': 'Access denied'}), 403
                     
 
-        # Return the thumbnail data
+        # Return the thumbnail data. Thumbnails are never modified, so clients may cache them
+        # for good and revalidate with the ETag; private, as access depends on the user
         logger.info(f"Thumbnail retrieved successfully: {thumbnail_id}")
-        return send_file(
+        response = send_file(
             io.BytesIO(thumbnail.image_data),
             mimetype=f'image/webp',
-            as_attachment=False
+            as_attachment=False,
+            etag=f'thumbnail-{thumbnail.id}',
+            max_age=_THUMBNAIL_MAX_AGE
         )
+        response.cache_control.public = False
+        response.cache_control.private = True
+        response.cache_control.immutable = True
+        return response
 
     @app.route('/api/thumbnails/<int:thumbnail_id>', methods=['DELETE'])
     @Auth.rest_auth_required
     def delete_thumbnail(user_id, thumbnail_id):
         logger.info(f"Deleting thumbnail: {thumbnail_id} for user: {user_id}")
-        thumbnail = Thumbnail.query.get_or_404(thumbnail_id)
+        thumbnail = db.get_or_404(Thumbnail, thumbnail_id)
 
         # Check if the user has access to the associated document or is an admin
         if thumbnail.document:
@@ -250,18 +438,19 @@ def setup_routes(app, file_processor):
     def handle_client_create_new_document(user_id):
         logger.info(f"Creating new document for user: {user_id}")
         try:
-            # Generate a unique document ID and ensure it doesn't already exist
-            while True:
+            # Create a new document for the user. A UUID4 collision is practically impossible,
+            # so rather than checking first, let the primary key reject it and retry once
+            document_id = str(uuid.uuid4())
+            try:
+                DocumentManager.create_document(user_id, document_id)
+            except IntegrityError:
+                db.session.rollback()
                 document_id = str(uuid.uuid4())
-                if not Document.query.filter_by(id=document_id).first():
-                    break
-
-            # Create a new document for the user
-            new_document = DocumentManager.create_document(user_id, document_id)
+                DocumentManager.create_document(user_id, document_id)
 
             logger.info(f"New document created with ID: {document_id} for user: {user_id}")
             return jsonify({
-                'documentId': new_document.id
+                'documentId': document_id
             })
         
         except IntegrityError as e:
@@ -287,67 +476,51 @@ def setup_routes(app, file_processor):
             logger.warning("Document search failed: User not found.")
             return jsonify({'message': 'User not found'}), 404
 
-        user = User.query.get_or_404(user_id)
+        db.get_or_404(User, user_id)
         
 
         try:
-            print("Searching for documents with term", search_term)
-            # Fetch documents owned by the user
-            owned_documents = Document.query.filter_by(user_id=user_id).all()
-
-            # Fetch documents shared with the user for read access
-            read_access_documents = [entry.document for entry in user.read_access_documents]
-
-            # Fetch documents shared with the user for edit access
-            edit_access_documents = [entry.document for entry in user.edit_access_documents]
-
-            # Combine all documents
-            all_accessible_documents = owned_documents + read_access_documents + edit_access_documents
-
-            # Remove duplicates (if a document is shared with both read and edit access)
-            unique_documents = list({doc.id: doc for doc in all_accessible_documents}.values())
+            logger.debug("Searching for documents with term %s", search_term)
+            # Documents the user owns or that are shared with them, each returned once by a single query
+            unique_documents = Document.query.filter(or_(
+                Document.user_id == user_id,
+                Document.id.in_(select(DocumentEditAccess.document_id).where(DocumentEditAccess.user_id == user_id)),
+                Document.id.in_(select(DocumentReadAccess.document_id).where(DocumentReadAccess.user_id == user_id)),
+            )).all()
 
             logger.debug(f"Getting embeddings for user: {user_id}")
-            user_embeddings = [EmbeddingManager.get_embeddings(doc) for doc in unique_documents]
+            user_embeddings = EmbeddingManager.get_document_embeddings_bulk(unique_documents)
             logger.debug(f"Found {len(user_embeddings)} embeddings for user")
 
             # Use the embedding manager to find similar documents
-            similar_file_embeddings = EmbeddingManager.find_similar_files(
+            similar_file_embedding_ids = EmbeddingManager.find_similar_files(
                 search_term,
                 embedding_ids=user_embeddings,
                 limit=10
             )
-            logger.debug(f"Found {len(similar_file_embeddings)} similar documents")
-            # Extract the document IDs from the similar file embeddings
-            similar_document_ids = {embedding.document_id for embedding in similar_file_embeddings if embedding.document_id}
-
-            # Fetch the actual documents using the IDs
-            similar_documents = Document.query.filter(Document.id.in_(similar_document_ids)).all()
+            logger.debug(f"Found {len(similar_file_embedding_ids)} similar documents")
+            if not similar_file_embedding_ids:
+                return jsonify([])
+
+            # Fetch the document rows together with their thumbnail ids, keeping the similarity ranking
+            rank = func.array_position(cast(similar_file_embedding_ids, ARRAY(Integer)), FileEmbedding.id)
+            rows = db.session.execute(
+                select(*_DOCUMENT_LIST_COLUMNS)
+                .select_from(Document)
+                .join(FileEmbedding, FileEmbedding.document_id == Document.id)
+                .outerjoin(Thumbnail, Thumbnail.document_id == Document.id)
+                .where(FileEmbedding.id.in_(similar_file_embedding_ids))
+                .order_by(rank)
+            ).mappings().all()
 
             documents_data = []
-            for document in similar_documents:
-                if document.thumbnail:
-                    documents_data.append({
-                        'id': document.id, 
-                        'thumbnail_id': document.thumbnail.id,
-                        'title': document.title, 
-                        'title_manually_set': document.title_manually_set, 
-                        'user_id': document.user_id, 
-                        'created_at': document.created_at, 
-                        'updated_at': document.updated_at, 
-                        'content': document.content}
-                        )
-                else:
-                    documents_data.append({
-                        'id': document.id, 
-                        'title': document.title, 
-                        'title_manually_set': document.title_manually_set, 
-                        'user_id': document.user_id, 
-                        'created_at': document.created_at, 
-                        'updated_at': document.updated_at, 
-                        'content': document.content}
-                        )
-                    
+            seen_document_ids = set()
+            for row in rows:
+                if row['id'] in seen_document_ids:
+                    continue
+                seen_document_ids.add(row['id'])
+                documents_data.append(_document_row_to_dict(row))
+
             logger.info(f"Document search successful for user: {user_id}")
             return jsonify(documents_data)
 
@@ -363,51 +536,29 @@ def setup_routes(app, file_processor):
             logger.warning("Document retrieval failed: User not found.")
             return jsonify({'message': 'User not found'}), 404
 
-        user = User.query.get_or_404(user_id)
-        
-
-        # Fetch documents owned by the user
-        owned_documents = Document.query.filter_by(user_id=user_id).all()
-
-        # Fetch documents shared with the user for read access
-        read_access_documents = [entry.document for entry in user.read_access_documents]
-
-        # Fetch documents shared with the user for edit access
-        edit_access_documents = [entry.document for entry in user.edit_access_documents]
-
-        # Combine all documents
-        all_accessible_documents = owned_documents + read_access_documents + edit_access_documents
+        db.get_or_404(User, user_id)
 
-        # Remove duplicates (if a document is shared with both read and edit access)
-        unique_documents = list({doc.id: doc for doc in all_accessible_documents}.values())
-
-        documents_data = []
-        for document in unique_documents:
-            # Determine the access level for this user
-            access_level = 'owner'
-            if int(document.user_id) != int(user_id):
-                if any(int(entry.user_id) == int(user_id) for entry in document.edit_access_entries):
-                    access_level = 'edit'
-                elif any(int(entry.user_id) == int(user_id) for entry in document.read_access_entries):
-                    access_level = 'read'
-            
-            
-            document_info = {
-                'id': document.id,
-                'title': document.title,
-                'title_manually_set': document.title_manually_set,
-                'user_id': document.user_id,
-                'created_at': document.created_at,
-                'updated_at': document.updated_at,
-                'content': document.content,
-                'access_level': access_level,  # Include the access level
-            }
+        # Documents the user owns or that are shared with them for read or edit access
+        edit_access_ids = select(DocumentEditAccess.document_id).where(DocumentEditAccess.user_id == user_id)
+        read_access_ids = select(DocumentReadAccess.document_id).where(DocumentReadAccess.user_id == user_id)
+        access_level = case(
+            (Document.user_id == user_id, 'owner'),
+            (Document.id.in_(edit_access_ids), 'edit'),
+            else_='read',
+        )
 
-            # Include thumbnail_id only if it exists
-            if document.thumbnail:
-                document_info['thumbnail_id'] = document.thumbnail.id
+        rows = db.session.execute(
+            select(*_DOCUMENT_LIST_COLUMNS, access_level.label('access_level'))
+            .select_from(Document)
+            .outerjoin(Thumbnail, Thumbnail.document_id == Document.id)
+            .where(or_(
+                Document.user_id == user_id,
+                Document.id.in_(edit_access_ids),
+                Document.id.in_(read_access_ids),
+            ))
+        ).mappings().all()
 
-            documents_data.append(document_info)
+        documents_data = [_document_row_to_dict(row) for row in rows]
 
         logger.info(f"Documents retrieved successfully for user: {user_id}")
         return jsonify(documents_data)
@@ -421,8 +572,6 @@ def setup_routes(app, file_processor):
             return jsonify({'message': 'User not found'}), 404
 
         # owner sees all other collaborators, others with rights only owner
-        user = User.query.get_or_404(user_id)
-                    
         owns_document = Document.query.filter_by(id=document_id, user_id=user_id).first()
         if owns_document:
             read_access_entries = DocumentReadAccess.query.filter_by(document_id=document_id).all()
@@ -457,12 +606,14 @@ def setup_routes(app, file_processor):
             logger.warning("Document deletion failed: User not found.")
             return jsonify({'message': 'User not found'}), 404
         
-        document = Document.query.filter_by(user_id=user_id, id=document_id).first()
-        if not document:
+        # A single DELETE, access rows, thumbnail and embeddings are removed by the database cascade
+        deleted = db.session.execute(
+            delete(Document).where(Document.user_id == user_id, Document.id == document_id)
+        ).rowcount
+        if not deleted:
             logger.warning(f"Document deletion failed: Document not found for ID: {document_id}")
             return jsonify({'message': 'Document not found'}), 404
         
-        db.session.delete(document)
         db.session.commit()
         logger.info(f"Document deleted successfully: {document_id}")
         return jsonify({'message': 'Document deleted'}), 200
@@ -480,7 +631,7 @@ def setup_routes(app, file_processor):
 
         
         try:
-            response = requests.get(url)
+            response = _http_session.get(url, timeout=Config.HTTP_TIMEOUT)
             response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
 
             # You might want to adjust the headers depending on what you're sending back
@@ -503,41 +654,67 @@ def setup_routes(app, file_processor):
             return jsonify({'error': 'Missing URL parameter'}), 400
 
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            
-            content = response.content
-            content_hash = hashlib.sha256(content).hexdigest()
+            # Revalidate a website fetched before with the validators its server sent, instead of downloading it again
+            headers = {}
+            fetched_website = (
+                FileContent.query
+                .options(db.load_only(FileContent.id, FileContent.http_etag, FileContent.http_last_modified))
+                .filter_by(filepath=url)
+                .first()
+            )
+            if fetched_website:
+                if fetched_website.http_etag:
+                    headers['If-None-Match'] = fetched_website.http_etag
+                if fetched_website.http_last_modified:
+                    headers['If-Modified-Since'] = fetched_website.http_last_modified
+
+            with _http_session.get(url, headers=headers, timeout=Config.HTTP_TIMEOUT, stream=True) as response:
+                response.raise_for_status()
+
+                if response.status_code == 304:
+                    logger.info(f"Website not modified since it was fetched: {url}")
+                    # Only now read the stored website, still leaving its content blob in the database
+                    stored_website = db.session.execute(
+                        select(
+                            FileContent.id,
+                            FileContent.file_type,
+                            FileContent.size,
+                            FileContent.last_modified,
+                            FileContent.text_content,
+                        ).where(FileContent.id == fetched_website.id)
+                    ).one()
+                    return jsonify(_existing_website_result(url, stored_website))
+
+                # Hash the body while it is downloaded instead of in a second pass
+                hasher = _content_hasher()
+                buffer = bytearray()
+                for chunk in response.iter_content(chunk_size=64 << 10):
+                    hasher.update(chunk)
+                    buffer.extend(chunk)
+                content = bytes(buffer)
+                content_hash = hasher.hexdigest()
+                content_type = response.headers.get('Content-Type', '').split(';')[0]
+                http_etag = response.headers.get('ETag')
+                http_last_modified = response.headers.get('Last-Modified')
             
             # Check if the website already exists in the database
-            existing_website = FileContent.query.filter_by(content_hash=content_hash).first()
+            existing_website = (
+                FileContent.query
+                .options(db.defer(FileContent.content))
+                .filter_by(content_hash=content_hash)
+                .first()
+            )
             if existing_website:
                 logger.info(f"Website already exists: {url}")
-                return jsonify({
-                    'filename': url,
-                    'file_id': existing_website.id,
-                    'raw': { 
-                        'File' : content.decode(),
-                        'type' : existing_website.file_type,
-                        'size' : existing_website.size, 
-                        'lastModified' : existing_website.last_modified
-                        },
-                    'success': True,
-                    'text_extracted': existing_website.text_content,
-                    'message': 'Website already exists',
-                    'content_type': 'file_content',
-                })
+                return jsonify(_existing_website_result(url, existing_website))
 
             # Parse the website content
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = BeautifulSoup(content, 'lxml')
             for script in soup(['script', 'style']):
                 script.decompose()
-            text = soup.get_text()
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = '\n'.join(chunk for chunk in chunks if chunk)
+            text = _TEXT_BREAK_RE.sub('\n', soup.get_text()).strip()
 
-            text_content_hash = hashlib.sha256(text.encode()).hexdigest()
+            text_content_hash = hashlib.sha256(text.encode(), usedforsecurity=False).hexdigest()
 
             last_modified = datetime.now()
             # Create a new FileContent object for the website
@@ -546,11 +723,14 @@ def setup_routes(app, file_processor):
                 filepath=url,
                 content=content,
                 content_hash=content_hash,
+                prefix_hash=_prefix_hash(content),
                 size=len(content),
-                file_type=response.headers.get('Content-Type', '').split(';')[0],
+                file_type=content_type,
                 text_content=text,
                 text_content_hash=text_content_hash,
-                last_modified=last_modified
+                last_modified=last_modified,
+                http_etag=http_etag,
+                http_last_modified=http_last_modified
             )
 
             db.session.add(file_content)
@@ -560,8 +740,7 @@ def setup_routes(app, file_processor):
                 'filename': url,
                 'file_id': file_content.id,
                 'raw': {
-                    'File' : response.content.decode(),
-                    'type' : response.headers.get('Content-Type', '').split(';')[0],
+                    'type' : content_type,
                     'size' : len(content),
                     'lastModified' : last_modified
                 },
@@ -596,12 +775,46 @@ def setup_routes(app, file_processor):
             logger.warning("Text extraction failed: No files selected.")
             return jsonify({'message': 'No files selected'}), 400
 
-        results = []
+        # Cheap duplicate pre-check: size plus a hash of the first bytes of each upload,
+        # looked up for all files with a single query
+        upload_keys = []
         for file in files:
+            if file:
+                prefix_hash = _prefix_hash(file.stream.read(_PREFIX_HASH_BYTES))
+                file_size = file.stream.seek(0, os.SEEK_END)
+                file.stream.seek(0)
+                upload_keys.append((file_size, prefix_hash))
+            else:
+                upload_keys.append(None)
+
+        candidates_by_key = {}
+        lookup_keys = {upload_key for upload_key in upload_keys if upload_key}
+        if lookup_keys:
+            candidates = (
+                FileContent.query
+                .options(db.load_only(FileContent.id, FileContent.size, FileContent.prefix_hash, FileContent.content_hash, FileContent.text_content))
+                .filter(tuple_(FileContent.size, FileContent.prefix_hash).in_(lookup_keys))
+                .all()
+            )
+            for candidate in candidates:
+                candidates_by_key.setdefault((candidate.size, candidate.prefix_hash), []).append(candidate)
+
+        # Hash all uploads in parallel; BLAKE3 releases the GIL while hashing
+        with ThreadPoolExecutor(max_workers=min(8, len(files))) as executor:
+            hashed_uploads = list(executor.map(
+                lambda file, upload_key: _hash_upload(file, upload_key in candidates_by_key) if file else (None, None),
+                files,
+                upload_keys
+            ))
+
+        results = []
+        pending = []
+        pending_by_hash = {}
+        extractions = []
+        for file, upload_key, (content, content_hash) in zip(files, upload_keys, hashed_uploads):
             if file:
                 try:
-                    # Read file content
-                    file_size = file.content_length
+                    filename = secure_filename(file.filename)
                     file_type = file.content_type
                     last_modified_field_name = f"{file.filename}.lastModified"
                     file_last_modified_str = request.form.get(last_modified_field_name)
@@ -612,14 +825,11 @@ def setup_routes(app, file_processor):
                         except (ValueError, TypeError):
                             logger.warning(f"Could not parse last_modified for {filename}")
 
-                    content = file.read()
-                    filename = secure_filename(file.filename)
-                    
-                    # Generate content hash
-                    content_hash = hashlib.sha256(content).hexdigest()
-                    
+                    file_size, prefix_hash = upload_key
+                    candidates = candidates_by_key.get(upload_key, [])
+
                     # Check if file already exists
-                    existing_file = FileContent.query.filter_by(content_hash=content_hash).first()
+                    existing_file = next((candidate for candidate in candidates if candidate.content_hash == content_hash), None)
                     if existing_file:
                         logger.debug(f"File already exists: {filename}")
                         results.append({
@@ -632,39 +842,54 @@ def setup_routes(app, file_processor):
                         })
                         continue
                     
-                    # Create new file content entry
-                    file_content = FileContent(
-                        user_id=user_id,
-                        filepath=filename,
-                        content=content,
-                        content_hash=content_hash,
-                        size=file_size,
-                        file_type=file_type,
-                        last_modified=file_last_modified
-                    )
-                    
-                    # Try to extract text content if possible
-                    try:
-                        file_content_data = file_processor.process_file_content(filename, content)
-                        
-                        file_content.text_content = file_content_data['text_content']
-                        file_content.text_content_hash = file_content_data['text_content_hash']
-                    except Exception as text_error:
-                        # If text extraction fails, continue without text content
-                        logger.error(f"Text extraction failed: {str(text_error)}")
+                    if content is None:
+                        content = file.stream.read()
+
+                    # The same file may appear twice in one upload
+                    if content_hash in pending_by_hash:
+                        pending_file_content = pending_by_hash[content_hash]
+                        logger.debug(f"File already exists: {filename}")
+                        result = {
+                            'filename': filename,
+                            'file_id': None,
+                            'success': True,
+                            'text_extracted': False,
+                            'message': 'File already exists',
+                            'content_type': 'file_content',
+                        }
+                        results.append(result)
+                        pending.append((pending_file_content, result))
+                        continue
+
+                    # Values of the new file content entry, inserted together with the other new files after the loop
+                    file_content = {
+                        'user_id': user_id,
+                        'filepath': filename,
+                        'content': content,
+                        'content_hash': content_hash,
+                        'prefix_hash': prefix_hash,
+                        'size': file_size,
+                        'file_type': file_type,
+                        'last_modified': file_last_modified,
+                        'text_content': None,
+                        'text_content_hash': None,
+                    }
                     
-                    db.session.add(file_content)
-                    db.session.commit()
+                    # Extract the text on the file processor's worker pool, in parallel for all new files
+                    extractions.append((file_content, file_processor.submit_file_content(filename, content)))
                     
                     logger.info(f"File processed: {filename}")
-                    results.append({
+                    result = {
                         'filename': filename,
-                        'file_id': file_content.id,
+                        'file_id': None,
                         'success': True,
-                        'text_extracted': file_content.text_content if file_content.text_content else False,
+                        'text_extracted': False,
                         'message': 'File processed',
                         'content_type': 'file_content',
-                    })
+                    }
+                    results.append(result)
+                    pending.append((file_content, result))
+                    pending_by_hash[content_hash] = file_content
                     
                 except Exception as e:
                     logger.error(f"Error processing file {file.filename}: {e}")
@@ -681,6 +906,54 @@ def setup_routes(app, file_processor):
                     'success': False
                 })
         
+        # Try to extract text content if possible
+        for file_content, extraction in extractions:
+            try:
+                file_content_data = extraction.result()
+                
+                file_content['text_content'] = file_content_data['text_content']
+                # Failed extractions report an empty hash, store NULL so they do not collide on the unique column
+                file_content['text_content_hash'] = file_content_data['text_content_hash'] or None
+            except Exception as text_error:
+                # If text extraction fails, continue without text content
+                logger.error(f"Text extraction failed: {str(text_error)}")
+
+        for file_content, result in pending:
+            result['text_extracted'] = file_content['text_content'] if file_content['text_content'] else False
+
+        # Store all new files with a single INSERT ... ON CONFLICT DO NOTHING and one commit
+        if pending:
+            try:
+                file_ids_by_hash = dict(db.session.execute(
+                    insert(FileContent)
+                    .values(list(pending_by_hash.values()))
+                    .on_conflict_do_nothing(index_elements=['content_hash'])
+                    .returning(FileContent.content_hash, FileContent.id)
+                ).all())
+
+                # Files a concurrent upload stored after the duplicate check were skipped, use their existing rows
+                conflicting_hashes = pending_by_hash.keys() - file_ids_by_hash.keys()
+                if conflicting_hashes:
+                    file_ids_by_hash.update(db.session.execute(
+                        select(FileContent.content_hash, FileContent.id)
+                        .where(FileContent.content_hash.in_(conflicting_hashes))
+                    ).all())
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.warning(f"Storing uploaded files failed, retrying one by one: {e}")
+                file_ids_by_hash = {
+                    content_hash: _commit_single_file_content(file_content)
+                    for content_hash, file_content in pending_by_hash.items()
+                }
+
+            for file_content, result in pending:
+                file_id = file_ids_by_hash.get(file_content['content_hash'])
+                if file_id is None:
+                    result.update({'file_id': None, 'success': False, 'error': 'Failed to store file'})
+                else:
+                    result['file_id'] = file_id
+
         logger.info("Text extraction completed.")
         return jsonify({
             'success': True,
@@ -696,20 +969,27 @@ def setup_routes(app, file_processor):
             logger.warning("User content retrieval failed: User not found.")
             return jsonify({'message': 'User not found'}), 404
 
-        # Query the database for all FileContent entries associated with the user
-        content_items = FileContent.query.filter_by(user_id=user_id).all()
+        # Query the listed columns of the user's FileContent entries, leaving the file and text blobs in the database
+        content_items = db.session.execute(
+            select(
+                FileContent.id,
+                FileContent.filepath,
+                FileContent.creation_date,
+                FileContent.last_modified,
+            ).where(FileContent.user_id == user_id)
+        ).all()
 
         # Serialize the data to JSON
         content_data = [{
             'file_id': item.id,
             'filename': item.filepath,
             'filepath': item.filepath,
-            'creation_date': item.creation_date.isoformat(),
+            'creation_date': item.creation_date,
             'last_modified_date': item.last_modified,
         } for item in content_items]
 
         logger.info(f"User content retrieved successfully for user: {user_id}")
-        return jsonify(content_data)
+        return _ojsonify(content_data)
 
     @app.route('/api/content/<int:content_id>', methods=['GET'])
     @Auth.rest_auth_required
@@ -727,7 +1007,7 @@ def setup_routes(app, file_processor):
             'file_id': content_entry.id,
             'filepath': content_entry.filepath,
             'filename': content_entry.filepath,
-            'creation_date': content_entry.creation_date.isoformat(),
+            'creation_date': content_entry.creation_date,
             'text_content': content_entry.text_content,
             'size' : content_entry.size,
             'type' : content_entry.file_type,
@@ -738,6 +1018,30 @@ def setup_routes(app, file_processor):
         logger.info(f"Content file retrieved successfully: {content_id}")
         return jsonify(content_data)
 
+    @app.route('/api/content/<int:content_id>/raw', methods=['GET'])
+    @Auth.rest_auth_required
+    def get_content_file_raw(user_id, content_id):
+        logger.info(f"Retrieving raw content file: {content_id} for user: {user_id}")
+
+        # Fetch the FileContent entry by ID and ensure it belongs to the current user
+        content_entry = FileContent.query.filter_by(id=content_id, user_id=user_id).first()
+
+        if not content_entry:
+            logger.warning(f"Raw content file not found or access denied for ID: {content_id}, user: {user_id}")
+            return jsonify({'message': 'Content not found or access denied'}), 404
+
+        logger.info(f"Raw content file retrieved successfully: {content_id}")
+        # Stored files and websites can be HTML with scripts, so never let the browser render them on the API origin
+        response = send_file(
+            io.BytesIO(content_entry.content),
+            mimetype=content_entry.file_type or 'application/octet-stream',
+            as_attachment=True,
+            download_name=secure_filename(os.path.basename(content_entry.filepath or '')) or f'content_{content_id}'
+        )
+        response.headers['X-Content-Type-Options'] = 'nosniff'
+        response.headers['Content-Security-Policy'] = 'sandbox'
+        return response
+
     @app.route('/api/upload_structure', methods=['POST'])
     @Auth.rest_auth_required
     def handle_structure_upload(user_id):
@@ -755,21 +1059,17 @@ def setup_routes(app, file_processor):
         
         if file:
             filename = secure_filename(file.filename)
-            filepath = os.path.join(Config.TMP_PATH, filename)
-            file.save(filepath)
+            input_format = _PANDOC_INPUT_FORMATS.get(os.path.splitext(filename)[1].lower(), 'markdown')
             
             try:
-                # Convert the document to Markdown using Pandoc
+                # Convert the document to Markdown using Pandoc, piping the upload through stdin
                 result = subprocess.run(
-                    ['pandoc', filepath, '-t', 'markdown', '--toc', '--normalize'],
+                    ['pandoc', '-f', input_format, '-t', 'markdown', '--toc'],
+                    input=file.stream.read(),
                     capture_output=True,
-                    text=True,
                     check=True
                 )
-                markdown_content = result.stdout
-                
-                # Optionally, remove the temporary file
-                os.remove(filepath)
+                markdown_content = result.stdout.decode('utf-8')
                 
                 logger.info(f"Document structure converted successfully for user: {user_id}")
                 return jsonify({
@@ -794,102 +1094,119 @@ def setup_routes(app, file_processor):
     @Auth.rest_admin_auth_required
     def get_users():
         logger.info("Retrieving all users for admin.")
-        users = User.query.all()
-        logger.info(f"Retrieved {len(users)} users.")
-        return jsonify([{'id': user.id, 'email': user.email, 'is_admin': user.is_admin, 'last_login_at': user.last_login_at} for user in users])
+        users = db.session.execute(
+            select(
+                User.id,
+                User.email,
+                User.is_admin,
+                User.last_login_at,
+            ).execution_options(yield_per=_STREAM_BATCH_SIZE)
+        ).mappings()
+
+        return _ojsonify_stream(users)
 
     @app.route('/api/admin/documents', methods=['GET'])
     @Auth.rest_admin_auth_required
     def get_documents():
         logger.info("Retrieving all documents for admin.")
-        documents = Document.query.all()
-        document_list = []
-        for doc in documents:
-            # Fetch collaborators (users with read or edit access)
-            collaborators = []
-            read_access_users = User.query.join(DocumentReadAccess, DocumentReadAccess.user_id == User.id).filter(DocumentReadAccess.document_id == doc.id).all()
-            edit_access_users = User.query.join(DocumentEditAccess, DocumentEditAccess.user_id == User.id).filter(DocumentEditAccess.document_id == doc.id).all()
-            for user in read_access_users:
-                collaborators.append({'id': user.id, 'email': user.email, 'access': 'read'})
-            for user in edit_access_users:
-                collaborators.append({'id': user.id, 'email': user.email, 'access': 'edit'})
-
-            # Calculate size using pg_column_size
-            size_query = text("SELECT pg_column_size(content) FROM documents WHERE id = :doc_id")
-            size_result = db.session.execute(size_query, {'doc_id': doc.id}).fetchone()
-            size_in_bytes = size_result[0] if size_result else 0
-            size_in_kb = round(size_in_bytes / 1024.0, 2)
-
-            doc_info = {
-                'id': doc.id,
-                'title': doc.title,
-                'title_manually_set': doc.title_manually_set,
-                'user_id': doc.user_id,
-                'created_at': doc.created_at,
-                'last_modified': doc.updated_at,
-                'size_kb': size_in_kb,
-                'collaborators': collaborators  # Add collaborators to the document info
-            }
-
-            # Include thumbnail_id only if it exists
-            if doc.thumbnail:
-                doc_info['thumbnail_id'] = doc.thumbnail.id
-
-            document_list.append(doc_info)
-
-        logger.info(f"Retrieved {len(document_list)} documents.")
-        return jsonify(document_list)
+        # Collaborators (users with read or edit access) of each document, aggregated to JSON by Postgres
+        read_collaborators = (
+            select(DocumentReadAccess.document_id, User.id, User.email, literal('read').label('access'))
+            .join(User, DocumentReadAccess.user_id == User.id)
+        )
+        edit_collaborators = (
+            select(DocumentEditAccess.document_id, User.id, User.email, literal('edit').label('access'))
+            .join(User, DocumentEditAccess.user_id == User.id)
+        )
+        collaborators = union_all(read_collaborators, edit_collaborators).subquery()
+        collaborators_json = (
+            select(func.coalesce(
+                func.json_agg(func.json_build_object(
+                    'id', collaborators.c.id,
+                    'email', collaborators.c.email,
+                    'access', collaborators.c.access,
+                )),
+                func.json_build_array(),
+            ))
+            .where(collaborators.c.document_id == Document.id)
+            .scalar_subquery()
+        )
+
+        # Select only the listed columns; the content itself is never loaded, only its size
+        documents = db.session.execute(
+            select(
+                Document.id,
+                Document.title,
+                Document.title_manually_set,
+                Document.user_id,
+                Document.created_at,
+                Document.updated_at,
+                Document.content_size_bytes.label('size_in_bytes'),
+                Thumbnail.id.label('thumbnail_id'),
+                collaborators_json.label('collaborators'),
+            )
+            .select_from(Document)
+            .outerjoin(Thumbnail, Thumbnail.document_id == Document.id)
+            .execution_options(yield_per=_STREAM_BATCH_SIZE)
+        )
+
+        return _ojsonify_stream(documents, _admin_document_row_to_dict)
 
     @app.route('/api/admin/file_contents', methods=['GET'])
     @Auth.rest_admin_auth_required
     def get_file_contents_list():
         logger.info("Retrieving all file contents for admin.")
-        file_contents = FileContent.query.all()
-        file_content_list = []
-        for file_content in file_contents:
-            file_content_list.append({
-                'id': file_content.id,
-                'filepath': file_content.filepath,
-                'size': file_content.size,
-                'file_type': file_content.file_type,
-                'last_modified': file_content.last_modified,
-                'creation_date': file_content.creation_date,
-                'text_content_hash': file_content.text_content_hash,
-                'content_hash': file_content.content_hash,
-                'user_id': file_content.user_id,
-            })
-
-        logger.info(f"Retrieved {len(file_content_list)} file contents.")
-        return jsonify(file_content_list)
+        etag = _listing_etag(FileContent)
+        if etag in request.if_none_match:
+            return _not_modified(etag)
+
+        file_contents = db.session.execute(
+            select(
+                FileContent.id,
+                FileContent.filepath,
+                FileContent.size,
+                FileContent.file_type,
+                FileContent.last_modified,
+                FileContent.creation_date,
+                FileContent.text_content_hash,
+                FileContent.content_hash,
+                FileContent.user_id,
+            ).execution_options(yield_per=_STREAM_BATCH_SIZE)
+        ).mappings()
+
+        response = _ojsonify_stream(file_contents)
+        response.set_etag(etag)
+        return response
 
     @app.route('/api/admin/file_embeddings', methods=['GET'])
     @Auth.rest_admin_auth_required
     def get_file_embeddings():
         logger.info("Retrieving all file embeddings for admin.")
-        file_embeddings = FileEmbedding.query.all()
-        file_embedding_list = []
-        for file_embedding in file_embeddings:
-            file_embedding_list.append({
-                'id': file_embedding.id,
-                'document_id': file_embedding.document_id,
-                'content_id': file_embedding.content_id,
-                'creation_date': file_embedding.creation_date,
-            })
-        logger.info(f"Retrieved {len(file_embedding_list)} file embeddings.")
-        return jsonify(file_embedding_list)
+        # No ETag here: embeddings are reassigned to other documents in place, which count and max id do not reveal
+        file_embeddings = db.session.execute(
+            select(
+                FileEmbedding.id,
+                FileEmbedding.document_id,
+                FileEmbedding.content_id,
+                FileEmbedding.creation_date,
+            ).execution_options(yield_per=_STREAM_BATCH_SIZE)
+        ).mappings()
+
+        return _ojsonify_stream(file_embeddings)
         
     # DELETE a user
     @app.route('/api/admin/users/<int:user_id>', methods=['DELETE'])
     @Auth.rest_admin_auth_required
     def delete_user(user_id):
         logger.info(f"Deleting user: {user_id}")
-        user = User.query.get_or_404(user_id)
-        documents_from_user = Document.query.filter_by(user_id=user_id).all()
-        for document in documents_from_user:
-            logger.info(f"Deleting document: {document.id} owned by user: {user_id}")
-            db.session.delete(document)
-        db.session.delete(user)
+        deleted = db.session.execute(delete(Document).where(Document.user_id == user_id)).rowcount
+        logger.info(f"Deleted {deleted} documents owned by user: {user_id}")
+        # Access grants and dialog histories of the user go with it through the ON DELETE CASCADE foreign keys
+        if not db.session.execute(delete(User).where(User.id == user_id)).rowcount:
+            db.session.rollback()
+            abort(404)
         db.session.commit()
+        Auth.invalidate_cached_user(user_id)
         logger.info(f"User deleted successfully: {user_id}")
         return jsonify({'message': 'User deleted'}), 200
 
@@ -898,9 +1215,10 @@ def setup_routes(app, file_processor):
     @Auth.rest_admin_auth_required
     def make_user_admin(user_id):
         logger.info(f"Making user admin: {user_id}")
-        user = User.query.get_or_404(user_id)
+        user = db.get_or_404(User, user_id)
         user.is_admin = True
         db.session.commit()
+        Auth.invalidate_cached_user(user_id)
         logger.info(f"User is now an admin: {user_id}")
         return jsonify({'message': 'User is now an admin'}), 200
 
@@ -909,9 +1227,10 @@ def setup_routes(app, file_processor):
     @Auth.rest_admin_auth_required
     def remove_user_admin(user_id):
         logger.info(f"Removing admin rights from user: {user_id}")
-        user = User.query.get_or_404(user_id)
+        user = db.get_or_404(User, user_id)
         user.is_admin = False
         db.session.commit()
+        Auth.invalidate_cached_user(user_id)
         logger.info(f"Admin rights removed from user: {user_id}")
         return jsonify({'message': 'User is no longer an admin'}), 200
 
@@ -920,8 +1239,8 @@ def setup_routes(app, file_processor):
     @Auth.rest_admin_auth_required
     def delete_document(document_id):
         logger.info(f"Deleting document: {document_id}")
-        document = Document.query.get_or_404(document_id)
-        db.session.delete(document)
+        if not db.session.execute(delete(Document).where(Document.id == document_id)).rowcount:
+            abort(404)
         db.session.commit()
         logger.info(f"Document deleted successfully: {document_id}")
         return jsonify({'message': 'Document deleted'}), 200
@@ -931,7 +1250,7 @@ def setup_routes(app, file_processor):
     @Auth.rest_admin_auth_required
     def get_document(document_id):
         logger.info(f"Retrieving document: {document_id}")
-        document = Document.query.get_or_404(document_id)
+        document = db.get_or_404(Document, document_id)
         if document.thumbnail:
             logger.info(f"Document retrieved: {document_id} with thumbnail")
             return jsonify({
@@ -959,7 +1278,8 @@ def setup_routes(app, file_processor):
     @Auth.rest_admin_auth_required
     def get_file_content(file_content_id):
         logger.info(f"Retrieving file content: {file_content_id}")
-        file_content = FileContent.query.get_or_404(file_content_id)
+        # The raw file is not part of the response, so leave the blob in the database
+        file_content = db.get_or_404(FileContent, file_content_id, options=[db.defer(FileContent.content)])
         
         logger.info(f"File content retrieved: {file_content_id}")
         return jsonify(
@@ -982,7 +1302,7 @@ def setup_routes(app, file_processor):
     @Auth.rest_admin_auth_required
     def delete_file_content(file_content_id):
         logger.info(f"Deleting file content: {file_content_id}")
-        file_content = FileContent.query.get_or_404(file_content_id)
+        file_content = db.get_or_404(FileContent, file_content_id)
         db.session.delete(file_content)
         db.session.commit()
         logger.info(f"File content deleted successfully: {file_content_id}")
@@ -992,18 +1312,21 @@ def setup_routes(app, file_processor):
     @Auth.rest_admin_auth_required
     def get_file_embedding(file_embedding_id):
         logger.info(f"Retrieving file embedding: {file_embedding_id}")
-        file_embedding = FileEmbedding.query.get_or_404(file_embedding_id)
+        file_embedding = db.get_or_404(
+            FileEmbedding, file_embedding_id,
+            options=[db.lazyload(FileEmbedding.content), db.selectinload(FileEmbedding.sequences)]
+        )
         sequence_embeddings = []
         for sequence_embedding in file_embedding.sequences:
             sequence_embeddings.append({
                 'id': sequence_embedding.id,
                 'sequence_hash': sequence_embedding.sequence_hash,
                 'sequence_text': sequence_embedding.sequence_text,
-                'embedding': sequence_embedding.embedding.tolist(),
+                'embedding': sequence_embedding.embedding,  # numpy array, encoded by orjson without Python floats
             })
         
         logger.info(f"File embedding retrieved: {file_embedding_id}")
-        return jsonify({
+        return _ojsonify({
             'id': file_embedding.id,
             'document_id': file_embedding.document_id,
             'content_id': file_embedding.content_id,
@@ -1015,7 +1338,7 @@ def setup_routes(app, file_processor):
     @Auth.rest_admin_auth_required
     def delete_file_embedding(file_embedding_id):
         logger.info(f"Deleting file embedding: {file_embedding_id}")
-        file_embedding = FileEmbedding.query.get_or_404(file_embedding_id)
+        file_embedding = db.get_or_404(FileEmbedding, file_embedding_id, options=[db.lazyload(FileEmbedding.content)])
         db.session.delete(file_embedding)
         db.session.commit()
         logger.info(f"File embedding deleted successfully: {file_embedding_id}")
@@ -1025,7 +1348,10 @@ def setup_routes(app, file_processor):
     @Auth.rest_admin_auth_required
     def get_file_embedding_sequences(file_embedding_id):
         logger.info(f"Retrieving sequences for file embedding: {file_embedding_id}")
-        file_embedding = FileEmbedding.query.get_or_404(file_embedding_id)
+        file_embedding = db.get_or_404(
+            FileEmbedding, file_embedding_id,
+            options=[db.lazyload(FileEmbedding.content), db.selectinload(FileEmbedding.sequences)]
+        )
         sequence_embeddings = []
         for sequence_embedding in file_embedding.sequences:
             sequence_embeddings.append({
@@ -1041,7 +1367,7 @@ def setup_routes(app, file_processor):
     @Auth.rest_admin_auth_required
     def get_sequence_embedding(file_embedding_id, sequence_embedding_id):
         logger.info(f"Retrieving sequence embedding: {sequence_embedding_id} for file embedding: {file_embedding_id}")
-        sequence_embedding = SequenceEmbedding.query.get_or_404(sequence_embedding_id)
+        sequence_embedding = db.get_or_404(SequenceEmbedding, sequence_embedding_id)
 
         # Check if the sequence embedding belongs to the specified file embedding
         if sequence_embedding.file_id != file_embedding_id:
@@ -1049,7 +1375,7 @@ def setup_routes(app, file_processor):
             return jsonify({'message': 'Sequence embedding not found for the specified file embedding'}), 404
         
         logger.info(f"Sequence embedding retrieved: {sequence_embedding_id}")
-        return jsonify({
+        return _ojsonify({
             'id': sequence_embedding.id,
             'sequence_hash': sequence_embedding.sequence_hash,
             'sequence_text': sequence_embedding.sequence_text,
@@ -1059,16 +1385,9 @@ def setup_routes(app, file_processor):
     @app.route('/health')
     def health_check():
         logger.debug("Health check requested.")
-        return jsonify({"status": "healthy"})
+        return current_app.response_class(_HEALTH_BODY, mimetype='application/json')
         
     @app.route('/api/test')
     def test_endpoint():
         logger.debug("Test endpoint requested.")
-        return jsonify({"message": "API is working"})
-
-    app.after_request
-    def after_request(response):
-        response.headers.add('Access-Control-Allow-Credentials', 'true')
-        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
-        response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
-        return response
\ No newline at end of file
+        return current_app.response_class(_TEST_BODY, mimetype='application/json')
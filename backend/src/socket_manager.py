@@ -60,7 +60,7 @@ class SocketManager:
         @self._socketio.on('connect')
         def handle_connect():
             self.emit_event(WebSocketEvent("server_connects", {}))
-            print("Client connected, before authentification")
+            logger.debug("Client connected, before authentification")
 
         # client disconnects from server
         @self._socketio.on('disconnect')
@@ -70,18 +70,17 @@ class SocketManager:
                 document_id = session.get('document_id')
                 if document_id:
                     leave_room(document_id)
-                    print(f"Client left room {document_id}")  # Log leaving room for debug
-                print('Client disconnected') # Log disconnect for debug
+                    logger.debug("Client left room %s", document_id)
+                logger.debug('Client disconnected')
 
             except KeyError as e:
-                print(f"Error during disconnect: {e}")
+                logger.error("Error during disconnect: %s", e)
 
 
         @self._socketio.on('client_authenticates')
         @Auth.socket_auth_required(emit_event=self.emit_event)
         def handle_client_authenticates(user_id, data): 
-            print("Client tries to authenticate")
-            print(f'Client authenticated: user_id={user_id}')
+            logger.debug('Client authenticated: user_id=%s', user_id)
 
         @self._socketio.on('client_leave_document')
         @Auth.socket_auth_required(emit_event=self.emit_event)
@@ -110,7 +109,7 @@ class SocketManager:
                 )
 
             except Exception as e:
-                print(f"Error handling client_leave_document: {e}")
+                logger.error("Error handling client_leave_document: %s", e)
                 self.emit_event(WebSocketEvent('server_error', {'message': str(e)}))
 
            
@@ -121,7 +120,7 @@ class SocketManager:
                 document_id = data.get('documentId')
                 
                 if not document_id:
-                    print(data)
+                    logger.warning("Missing documentId in client_get_document: %s", data)
                     raise ValueError("Missing documentId field in handle_get_document")
                 
                 document = Document.query.get_or_404(document_id)
@@ -141,7 +140,7 @@ class SocketManager:
                         
                 
                 if not access_rights:
-                    print(f"WARNING! Client {user_id} tries to get unauthorized access to document {document_id}.")
+                    logger.warning("Client %s tries to get unauthorized access to document %s.", user_id, document_id)
                     return
                 
                 # Store the document ID in the session for this client
@@ -184,7 +183,7 @@ class SocketManager:
                 }))
                 
             except Exception as e:
-                print(f"Error getting document: {str(e)}")
+                logger.error("Error getting document: %s", e)
                 self._socketio.emit('error', {'message': str(e)})
         
         @self._socketio.on('client_text_change')
@@ -213,7 +212,7 @@ class SocketManager:
                                 room=document_id, include_self=False)
                 
             except Exception as e:
-                print(f"Error handling text change server: {str(e)}")
+                logger.error("Error handling text change server: %s", e)
                 self.emit_event(WebSocketEvent('error', {'message': str(e), 'type' : str(type(e))}))
         
         @self._socketio.on('client_request_suggestions')
@@ -253,11 +252,11 @@ class SocketManager:
                         'requestId': request_id
                     }))
 
-                print(f"Title Mnaually set: {document.title_manually_set}, len content string: {len(content_str)}")
+                logger.debug("Title manually set: %s, len content string: %d", document.title_manually_set, len(content_str))
 
                 # Generate a title for the document
                 if (not document.title or (document.title and not len(document.title) > 3)) and not document.title_manually_set and len(content_str) > Config.TITLE_DOCUMENT_LENGTH_THRESHOLD:
-                    print("Generating title")
+                    logger.debug("Generating title")
                     title = self._autocomplete_manager.generate_title(content_str)
                     if title:
                         document.title = title
@@ -270,7 +269,7 @@ class SocketManager:
                 
                 
             except Exception as e:
-                print(f"Error handling generating suggestions: {str(e)}")
+                logger.error("Error handling generating suggestions: %s", e)
                 self.emit_event(WebSocketEvent('error', {'message': str(e), 'type' : str(type(e))}))
         
         
@@ -300,15 +299,16 @@ class SocketManager:
                     'userId' : user_id,
                 }), room=document_id, include_self=False)
             except Exception as e:
-                print(f"Error handling title change: {str(e)}")
+                logger.error("Error handling title change: %s", e)
                 self.emit_event(WebSocketEvent('error', {'message': str(e), 'type' : str(type(e))}))
                 return False
             
         @self._socketio.on('client_content_changes')
         @Auth.socket_auth_required(emit_event=self.emit_event)
         def handle_client_content_changes(user_id, data):
-            print("Content uploaded or selection changed")
-            print(data)
+            logger.debug("Content uploaded or selection changed")
+            # The selection carries the extracted text of every item, only format it when debugging
+            logger.debug("Content selection: %s", data)
             if not session['access_rights'] in ["owner", "edit"]:
                 self.emit_event(WebSocketEvent('error', {'message' : 'No rights to upload content'}))
                 return
@@ -323,7 +323,7 @@ class SocketManager:
             if not session['access_rights'] in ["owner", "edit"]:
                 self.emit_event(WebSocketEvent('error', {'message' : 'No rights to change structure'}))
                 return
-            print("Structure uploaded")
+            logger.debug("Structure uploaded")
             if not data:
                 self.emit_event(WebSocketEvent('server_error', {'message': 'Missing data'}))
                 return
@@ -349,7 +349,7 @@ class SocketManager:
 
             # Extract structure from the uploaded text
             extracted_structure = self._structure_manager.extract_structure(structure_text)
-            print("Extracted structure:", extracted_structure)
+            logger.debug("Extracted structure: %s", extracted_structure)
 
             # get the current document
             document_id = session.get('document_id')
@@ -383,7 +383,7 @@ class SocketManager:
                 self.emit_event(WebSocketEvent('error', {'message' : 'No rights to edit document'}))
                 return
             
-            print("Structure removed")
+            logger.debug("Structure removed")
             if not data or not 'content' in data:
                 self.emit_event(WebSocketEvent('server_error', {'message': 'Missing data'}))
                 return
@@ -407,13 +407,13 @@ class SocketManager:
                 'title': document.title,
                 'content': data["content"]
             }), room=document_id, include_self=False)
-            print("Document content updated")
+            logger.debug("Document content updated")
             
 
         @self._socketio.on('client_structure_rejected')
         @Auth.socket_auth_required(emit_event=self.emit_event)
         def handle_client_structure_rejected(user_id, data):
-            print("Structure rejected")
+            logger.debug("Structure rejected")
 
         @self._socketio.on('client_chat')
         @Auth.socket_auth_required(emit_event=self.emit_event)
@@ -534,11 +534,10 @@ class SocketManager:
         try:
             self._socketio.emit(event.name, event.data, **kwargs)
             if Config.SHOW_EMIT_SUCCESS:
-                print(f"🚀 Emitting event '{event.name}' with data: {event.data} and kwargs {kwargs}")
-                print(f"✅ Successfully emitted event '{event.name}'")
+                logger.debug("Emitted event '%s' with data: %s and kwargs %s", event.name, event.data, kwargs)
             return True
         except Exception as e:
-            print(f"❌ Error emitting event: {str(e)}")
+            logger.error("Error emitting event: %s", e)
             return False
     
     @property
@@ -0,0 +1,66 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+# The backend modules import each other by their bare names from the src folder
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+
+@pytest.fixture(scope='session')
+def app():
+    """
+    The backend app on the scratch Postgres database named by EDDY_TEST_DATABASE_URI, which needs the
+    vector extension. Its tables are created for the test session and dropped afterwards.
+    """
+    database_uri = os.getenv('EDDY_TEST_DATABASE_URI')
+    if not database_uri:
+        pytest.skip('EDDY_TEST_DATABASE_URI is not set')
+
+    from app import create_app
+    from config import Config
+    from models import db
+
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = database_uri
+
+    app = create_app(TestConfig)
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    """Test client of the app, emptying all tables after the test."""
+    from models import db
+
+    with app.app_context():
+        yield app.test_client()
+
+        db.session.rollback()
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
+
+
+@pytest.fixture
+def user(client):
+    from models import db, User
+
+    user = User(email='user@example.com')
+    user.set_password('password')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def auth_headers(user, monkeypatch):
+    from auth import Auth
+
+    monkeypatch.setattr(Auth, 'SECRET_KEY', 'test-secret')
+    return {'Authorization': f'Bearer {Auth.generate_token(str(user.id), user.is_admin)}'}
@@ -0,0 +1,42 @@
+# tests/test_auth.py
+from types import SimpleNamespace
+
+import pytest
+
+import auth
+from auth import Auth
+
+
+class _FakeUserQuery:
+    def __init__(self, users):
+        self.users = users
+        self.lookups = 0
+
+    def filter_by(self, id):
+        self.lookups += 1
+        return SimpleNamespace(first=lambda: self.users.get(int(id)))
+
+
+@pytest.fixture
+def user_query(monkeypatch):
+    query = _FakeUserQuery({5: SimpleNamespace(id=5, email='user@example.com', is_admin=True)})
+    monkeypatch.setattr(auth, 'User', SimpleNamespace(query=query))
+    Auth._user_cache.clear()
+    yield query
+    Auth._user_cache.clear()
+
+
+def test_cached_user_is_shared_between_string_and_integer_ids(user_query):
+    assert Auth.get_cached_user('5') == {'id': 5, 'email': 'user@example.com', 'isAdmin': True}
+    assert Auth.get_cached_user(5) == {'id': 5, 'email': 'user@example.com', 'isAdmin': True}
+    assert user_query.lookups == 1
+
+
+def test_invalidate_with_integer_id_drops_user_cached_by_string_id(user_query):
+    Auth.get_cached_user('5')
+    user_query.users[5].is_admin = False
+
+    Auth.invalidate_cached_user(5)
+
+    assert Auth.get_cached_user('5')['isAdmin'] is False
+    assert user_query.lookups == 2
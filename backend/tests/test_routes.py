@@ -0,0 +1,140 @@
+# tests/test_routes.py
+import hashlib
+import io
+import random
+
+import pytest
+from sqlalchemy import func, select
+
+from routes import _TEXT_BREAK_RE
+
+
+def _split_text_chunks(text):
+    """The splitlines based cleanup of website text that _TEXT_BREAK_RE replaces."""
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return '\n'.join(chunk for chunk in chunks if chunk)
+
+
+def _collapse_text_breaks(text):
+    return _TEXT_BREAK_RE.sub('\n', text).strip()
+
+
+def test_text_break_regex_splits_on_every_line_boundary():
+    text = 'a\rb\vc\fd\x1ce\x1df\x1eg\x85h\u2028i\u2029j\r\nk'
+    assert _collapse_text_breaks(text) == 'a\nb\nc\nd\ne\nf\ng\nh\ni\nj\nk'
+
+
+def test_text_break_regex_matches_splitlines_cleanup():
+    pieces = ['a', 'b', ' ', '  ', '\t', '\n', '\r', '\r\n', '\v', '\f', '\x1c', '\x1d', '\x1e', '\x1f',
+              '\x85', '\u2028', '\u2029', '\xa0', '\u3000']
+    rng = random.Random(0)
+    for _ in range(20000):
+        text = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+        assert _collapse_text_breaks(text) == _split_text_chunks(text), repr(text)
+
+
+def test_raw_content_is_served_as_sandboxed_download(client, user, auth_headers):
+    from models import db, FileContent
+
+    page = b'<html><script>alert(document.cookie)</script></html>'
+    file_content = FileContent(
+        user_id=user.id,
+        filepath='https://example.com/page.html',
+        content=page,
+        content_hash='raw-content-hash',
+        size=len(page),
+        file_type='text/html',
+    )
+    db.session.add(file_content)
+    db.session.commit()
+
+    response = client.get(f'/api/content/{file_content.id}/raw', headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.data == page
+    assert response.headers['Content-Disposition'].startswith('attachment')
+    assert response.headers['X-Content-Type-Options'] == 'nosniff'
+    assert response.headers['Content-Security-Policy'] == 'sandbox'
+
+
+def _upload(client, auth_headers, *files):
+    """Posts (filename, content) pairs to the text extraction route and returns its results."""
+    response = client.post(
+        '/api/extract_text',
+        headers=auth_headers,
+        data={'files': [(io.BytesIO(content), filename) for filename, content in files]},
+        content_type='multipart/form-data',
+    )
+    assert response.status_code == 200
+    return response.get_json()['results']
+
+
+def _file_content_count():
+    from models import db, FileContent
+
+    return db.session.execute(select(func.count()).select_from(FileContent)).scalar_one()
+
+
+def test_extract_text_stores_a_file_uploaded_twice_in_one_batch_once(client, auth_headers):
+    content = b'The same notes uploaded twice in one batch.\n'
+
+    first, second = _upload(client, auth_headers, ('notes.txt', content), ('notes-copy.txt', content))
+
+    assert first['success'] and second['success']
+    assert first['message'] == 'File processed'
+    assert second['message'] == 'File already exists'
+    assert first['file_id'] is not None
+    assert second['file_id'] == first['file_id']
+    assert _file_content_count() == 1
+
+
+def test_extract_text_reuses_a_file_already_in_the_database(client, auth_headers):
+    content = b'Notes that were uploaded in an earlier request.\n'
+    [stored] = _upload(client, auth_headers, ('notes.txt', content))
+
+    [duplicate] = _upload(client, auth_headers, ('notes-again.txt', content))
+
+    assert duplicate['success']
+    assert duplicate['message'] == 'File already exists'
+    assert duplicate['file_id'] == stored['file_id']
+    assert _file_content_count() == 1
+
+
+def test_extract_text_stores_every_file_whose_extraction_failed(client, auth_headers):
+    first, second = _upload(client, auth_headers, ('first.bin', b'\x00\x01' * 512), ('second.bin', b'\x02\x03' * 512))
+
+    assert first['success'] and second['success']
+    assert first['text_extracted'] is False and second['text_extracted'] is False
+    assert None not in (first['file_id'], second['file_id'])
+    assert first['file_id'] != second['file_id']
+    assert _file_content_count() == 2
+
+
+def test_extract_text_falls_back_to_single_inserts_when_the_batch_conflicts(client, user, auth_headers):
+    pytest.importorskip('textract')
+    from models import db, FileContent
+
+    text = 'Text that another stored file already contains.'
+    db.session.add(FileContent(
+        user_id=user.id,
+        filepath='stored.pdf',
+        content=b'%PDF stored file',
+        content_hash='stored-content-hash',
+        size=16,
+        text_content=text,
+        text_content_hash=hashlib.sha256(text.encode()).hexdigest(),
+    ))
+    db.session.commit()
+
+    conflicting, new = _upload(
+        client, auth_headers,
+        ('conflicting.txt', text.encode()),
+        ('new.txt', b'Text that no other stored file contains yet.'),
+    )
+
+    # The batch insert fails on the duplicate text hash, the one by one retry still stores the other file
+    assert conflicting['success'] is False
+    assert conflicting['error'] == 'Failed to store file'
+    assert new['success'] and new['file_id'] is not None
+    assert _file_content_count() == 2
@@ -86,7 +86,7 @@ export const DocumentManagement = () => {
                                 <th>User ID</th>
                                 <th>Created At</th>
                                 <th>Last Modified</th>
-                                <th>Size (KB)</th>
+                                <th>Content JSON Size (KB)</th>
                                 <th>Collaborators</th>
                                 <th>Actions</th>
                             </tr>